@@ -2,10 +2,19 @@ DOMAIN = "etbus"
 
 MULTICAST_GROUP = "239.10.0.1"
 MULTICAST_PORT = 5555
+DEST_ADDR = (MULTICAST_GROUP, MULTICAST_PORT)
 
 PING_INTERVAL = 30
 OFFLINE_TIMEOUT = 60
 
+# Drop bit-identical state frames repeated within this window
+# (multicast duplication / device re-sends)
+DEDUP_WINDOW_S = 1.5
+DEDUP_CACHE_SIZE = 256
+
+# Outbound sends within this window are batched and deduped per device
+SEND_BATCH_WINDOW_S = 0.05
+
 # QoS retry timing (fast but bounded)
 # 0ms, 40ms, 80ms, 150ms, 300ms, 600ms, 1s
 QOS_RETRY_DELAYS_S = (0.00, 0.04, 0.08, 0.15, 0.30, 0.60, 1.00)
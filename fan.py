@@ -1,238 +1,302 @@
-from __future__ import annotations
-
-import logging
-import time
-from typing import Any
-
-from homeassistant.components.fan import FanEntity, FanEntityFeature
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_call_later
-
-from .const import DOMAIN, QOS_RETRY_DELAYS_S, QOS_MAX_TOTAL_S
-from .hub import EtBusHub
-
-_LOGGER = logging.getLogger(__name__)
-
-_PRESET_LIST = ["low", "medium", "high"]
-
-
-async def async_setup_entry(
-    hass: HomeAssistant,
-    entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
-) -> None:
-    hub: EtBusHub = hass.data[DOMAIN][entry.entry_id]
-    entities: dict[tuple[str, str], EtBusFan] = {}
-
-    @callback
-    def handle_message(msg: dict[str, Any]) -> None:
-        if msg.get("v") != 1:
-            return
-
-        mtype = msg.get("type")
-        dev_id = msg.get("id")
-        dev_class = msg.get("class")
-        payload = msg.get("payload", {}) or {}
-
-        if not dev_id or dev_class not in ("fan.speed", "fan.preset"):
-            return
-
-        endpoint = dev_class.replace(".", "_")
-        key = (dev_id, endpoint)
-
-        if mtype in ("discover", "state", "pong"):
-            if key not in entities:
-                name = payload.get("name", dev_id)
-                ent = EtBusFan(hass, hub, dev_id, dev_class, endpoint, name)
-                entities[key] = ent
-                async_add_entities([ent])
-                _LOGGER.info("ET-Bus: discovered %s %s", dev_class, dev_id)
-
-            if mtype == "state":
-                entities[key].handle_state(payload)
-
-    hub.register_listener(handle_message)
-
-
-class EtBusFan(FanEntity):
-    _attr_should_poll = False
-    _attr_entity_registry_enabled_default = True
-
-    def __init__(self, hass: HomeAssistant, hub: EtBusHub, dev_id: str, dev_class: str, endpoint: str, name: str):
-        self.hass = hass
-        self._hub = hub
-        self._dev_id = dev_id
-        self._dev_class = dev_class
-        self._endpoint = endpoint
-
-        self._attr_name = name
-        self._is_on = False
-        self._percentage = 0
-        self._preset = None
-
-        self._extra: dict[str, Any] = {}
-
-        self._pending: dict[str, Any] | None = None
-        self._pending_started: float = 0.0
-        self._pending_try: int = 0
-        self._pending_unsub = None
-
-        self._attr_unique_id = f"etbus_{dev_id}_{endpoint}"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, dev_id)},
-            "name": dev_id,
-            "manufacturer": "ElectronicsTech",
-        }
-
-        # Features
-        if self._dev_class == "fan.speed":
-            self._attr_supported_features = FanEntityFeature.SET_SPEED
-        else:
-            self._attr_supported_features = FanEntityFeature.PRESET_MODE
-            self._attr_preset_modes = list(_PRESET_LIST)
-
-    @property
-    def is_on(self) -> bool:
-        return self._is_on
-
-    @property
-    def percentage(self) -> int | None:
-        return self._percentage if self._dev_class == "fan.speed" else None
-
-    @property
-    def preset_mode(self) -> str | None:
-        return self._preset if self._dev_class == "fan.preset" else None
-
-    @property
-    def extra_state_attributes(self):
-        return self._extra
-
-    def handle_state(self, payload: dict[str, Any]) -> None:
-        if "on" in payload:
-            self._is_on = bool(payload["on"])
-
-        if self._dev_class == "fan.speed" and "speed" in payload:
-            try:
-                self._percentage = int(payload["speed"])
-            except Exception:
-                pass
-
-        if self._dev_class == "fan.preset" and "preset" in payload:
-            self._preset = str(payload["preset"])
-
-        extra = dict(payload)
-        extra.pop("on", None)
-        self._extra = extra
-
-        # confirm qos
-        if self._pending is not None:
-            want_on = bool(self._pending.get("on", self._is_on))
-            if self._dev_class == "fan.speed":
-                want_speed = int(self._pending.get("speed", self._percentage))
-                if self._is_on == want_on and self._percentage == want_speed:
-                    self._qos_clear()
-            else:
-                want_preset = str(self._pending.get("preset", self._preset))
-                if self._is_on == want_on and (self._preset == want_preset):
-                    self._qos_clear()
-
-        if self.hass is not None:
-            self.async_write_ha_state()
-
-    def _qos_clear(self) -> None:
-        self._pending = None
-        self._pending_try = 0
-        self._pending_started = 0.0
-        if self._pending_unsub:
-            try:
-                self._pending_unsub()
-            except Exception:
-                pass
-        self._pending_unsub = None
-
-    def _send_now(self) -> None:
-        if self._pending is None:
-            return
-        self._hub.send_to(
-            self._dev_id,
-            {
-                "v": 1,
-                "type": "command",
-                "id": self._dev_id,
-                "class": self._dev_class,
-                "payload": dict(self._pending),
-            },
-        )
-
-    def _qos_tick(self, _now=None) -> None:
-        if self._pending is None:
-            return
-
-        if (time.monotonic() - self._pending_started) > QOS_MAX_TOTAL_S:
-            _LOGGER.warning("ET-Bus QoS timeout (fan): %s", self._dev_id)
-            self._qos_clear()
-            return
-
-        self._send_now()
-
-        self._pending_try += 1
-        delay_idx = min(self._pending_try, len(QOS_RETRY_DELAYS_S) - 1)
-        delay = QOS_RETRY_DELAYS_S[delay_idx]
-        self._pending_unsub = async_call_later(self.hass, delay, self._qos_tick)
-
-    async def async_turn_on(self, **kwargs: Any) -> None:
-        self._is_on = True
-        # keep last speed/preset
-        self._pending = {"on": True}
-        if self._dev_class == "fan.speed":
-            self._pending["speed"] = int(self._percentage)
-        else:
-            self._pending["preset"] = str(self._preset or _PRESET_LIST[0])
-
-        self._pending_started = time.monotonic()
-        self._pending_try = 0
-        self._qos_tick()
-        if self.hass is not None:
-            self.async_write_ha_state()
-
-    async def async_turn_off(self, **kwargs: Any) -> None:
-        self._is_on = False
-        self._pending = {"on": False}
-        if self._dev_class == "fan.speed":
-            self._pending["speed"] = int(self._percentage)
-        else:
-            self._pending["preset"] = str(self._preset or _PRESET_LIST[0])
-
-        self._pending_started = time.monotonic()
-        self._pending_try = 0
-        self._qos_tick()
-        if self.hass is not None:
-            self.async_write_ha_state()
-
-    async def async_set_percentage(self, percentage: int) -> None:
-        if self._dev_class != "fan.speed":
-            return
-        self._percentage = int(max(0, min(100, percentage)))
-        self._is_on = self._percentage > 0
-
-        self._pending = {"on": self._is_on, "speed": int(self._percentage)}
-        self._pending_started = time.monotonic()
-        self._pending_try = 0
-        self._qos_tick()
-        if self.hass is not None:
-            self.async_write_ha_state()
-
-    async def async_set_preset_mode(self, preset_mode: str) -> None:
-        if self._dev_class != "fan.preset":
-            return
-        self._preset = preset_mode
-        self._is_on = True
-
-        self._pending = {"on": True, "preset": str(preset_mode)}
-        self._pending_started = time.monotonic()
-        self._pending_try = 0
-        self._qos_tick()
-        if self.hass is not None:
-            self.async_write_ha_state()
+from __future__ import annotations
+
+import logging
+from types import MappingProxyType
+from typing import Any
+
+from homeassistant.components.fan import FanEntity, FanEntityFeature
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, QOS_RETRY_DELAYS_S, QOS_MAX_TOTAL_S
+from .hub import EtBusHub, shared_device_info
+
+_LOGGER = logging.getLogger(__name__)
+_LOG_INFO = logging.INFO
+
+
+def _noop() -> None:
+    """Placeholder state writer until the entity is registered with HA."""
+
+
+_PRESET_LIST = ("low", "medium", "high")
+
+_MISSING = object()
+
+# class -> endpoint, precomputed so the hot callback does one dict lookup
+# instead of a tuple scan plus str.replace per message.
+_ENDPOINT_MAP = {"fan.speed": "fan_speed", "fan.preset": "fan_preset"}
+_HANDLED_TYPES = frozenset({"discover", "state", "pong"})
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    hub: EtBusHub = hass.data[DOMAIN][entry.entry_id]
+    entities: dict[tuple[str, str], EtBusFan] = {}
+
+    @callback
+    def handle_message(msg: dict[str, Any]) -> None:
+        get = msg.get
+        if get("v") != 1:
+            return
+
+        dev_class = get("class")
+        endpoint = _ENDPOINT_MAP.get(dev_class)
+        if endpoint is None:
+            return
+
+        dev_id = get("id")
+        if not dev_id:
+            return
+
+        mtype = get("type")
+        if mtype not in _HANDLED_TYPES:
+            return
+
+        payload = get("payload") or {}
+
+        ent = entities.get((dev_id, endpoint))
+        if ent is None:
+            name = payload.get("name", dev_id)
+            ent = EtBusFan(hass, hub, dev_id, dev_class, endpoint, name)
+            entities[(dev_id, endpoint)] = ent
+            async_add_entities([ent])
+            if _LOGGER.isEnabledFor(_LOG_INFO):
+                _LOGGER.info("ET-Bus: discovered %s %s", dev_class, dev_id)
+
+        if mtype == "state":
+            ent.handle_state(payload)
+
+    entry.async_on_unload(
+        hub.register_listener(handle_message, classes=("fan.speed", "fan.preset"))
+    )
+
+
+class EtBusFan(FanEntity):
+    # Slot the per-instance state touched on every packet. The HA base
+    # class is unslotted, so _attr_* and hass still land in the inherited
+    # __dict__ where the entity machinery expects its defaults.
+    __slots__ = (
+        "_hub",
+        "_dev_id",
+        "_dev_class",
+        "_endpoint",
+        "_is_on",
+        "_percentage",
+        "_preset",
+        "_extra",
+        "_extra_backing",
+        "_pending",
+        "_pending_started",
+        "_pending_try",
+        "_cmd_skeleton",
+        "_loop_time",
+        "_writer",
+    )
+
+    _attr_should_poll = False
+    _attr_entity_registry_enabled_default = True
+
+    def __init__(self, hass: HomeAssistant, hub: EtBusHub, dev_id: str, dev_class: str, endpoint: str, name: str):
+        self.hass = hass
+        self._hub = hub
+        # QoS deadlines use the loop clock (monotonic, shared with the hub
+        # scheduler); bind it once so ticks skip the attribute chain.
+        self._loop_time = hass.loop.time
+        self._dev_id = dev_id
+        self._dev_class = dev_class
+        self._endpoint = endpoint
+
+        self._attr_name = name
+        self._is_on = False
+        self._percentage = 0
+        self._preset = None
+
+        # One backing dict mutated in place; HA reads a stable proxy.
+        self._extra_backing: dict[str, Any] = {}
+        self._extra = MappingProxyType(self._extra_backing)
+
+        self._pending: dict[str, Any] | None = None
+        self._pending_started: float = 0.0
+        self._pending_try: int = 0
+
+        # Command envelope is constant apart from the payload slot; the hub
+        # encodes on send, so reusing one dict per entity is safe.
+        self._cmd_skeleton: dict[str, Any] = {
+            "v": 1,
+            "type": "command",
+            "id": dev_id,
+            "class": dev_class,
+            "payload": None,
+        }
+
+        self._attr_unique_id = f"etbus_{dev_id}_{endpoint}"
+        self._attr_device_info = shared_device_info(dev_id)
+        self._writer = _noop
+
+        # Features
+        if self._dev_class == "fan.speed":
+            self._attr_supported_features = FanEntityFeature.SET_SPEED
+        else:
+            self._attr_supported_features = FanEntityFeature.PRESET_MODE
+            self._attr_preset_modes = _PRESET_LIST
+
+    async def async_added_to_hass(self) -> None:
+        # Bind the real state writer once registered; the hot handlers can
+        # then call it without re-checking self.hass on every frame.
+        self._writer = self.async_write_ha_state
+
+    @property
+    def is_on(self) -> bool:
+        return self._is_on
+
+    @property
+    def percentage(self) -> int | None:
+        return self._percentage if self._dev_class == "fan.speed" else None
+
+    @property
+    def preset_mode(self) -> str | None:
+        return self._preset if self._dev_class == "fan.preset" else None
+
+    @property
+    def extra_state_attributes(self):
+        return self._extra
+
+    def handle_state(self, payload: dict[str, Any]) -> None:
+        new_on = bool(payload["on"]) if "on" in payload else self._is_on
+
+        new_percentage = self._percentage
+        if self._dev_class == "fan.speed" and "speed" in payload:
+            try:
+                new_percentage = int(payload["speed"])
+            except Exception:
+                pass
+
+        new_preset = self._preset
+        if self._dev_class == "fan.preset" and "preset" in payload:
+            new_preset = str(payload["preset"])
+
+        # Diff the extra attributes against the backing dict without
+        # allocating a copy; only rebuild it when something differs.
+        backing = self._extra_backing
+        extra_changed = len(backing) != (len(payload) - ("on" in payload)) or any(
+            backing.get(k, _MISSING) != v for k, v in payload.items() if k != "on"
+        )
+        if extra_changed:
+            backing.clear()
+            backing.update(payload)
+            backing.pop("on", None)
+
+        changed = (
+            new_on != self._is_on
+            or new_percentage != self._percentage
+            or new_preset != self._preset
+            or extra_changed
+        )
+
+        self._is_on = new_on
+        self._percentage = new_percentage
+        self._preset = new_preset
+
+        # confirm qos (even for a repeat frame — it may confirm a retry)
+        if self._pending is not None and self._qos_satisfied():
+            self._qos_clear()
+
+        # Chatty devices re-send identical state; skip the HA write then.
+        if changed:
+            self._writer()
+
+    def _qos_satisfied(self) -> bool:
+        want_on = bool(self._pending.get("on", self._is_on))
+        if self._dev_class == "fan.speed":
+            want_speed = int(self._pending.get("speed", self._percentage))
+            return self._is_on == want_on and self._percentage == want_speed
+        want_preset = str(self._pending.get("preset", self._preset))
+        return self._is_on == want_on and self._preset == want_preset
+
+    def _qos_clear(self) -> None:
+        # Any tick still queued on the hub scheduler becomes a no-op.
+        self._pending = None
+        self._pending_try = 0
+        self._pending_started = 0.0
+
+    def _send_now(self) -> None:
+        if self._pending is None:
+            return
+        self._cmd_skeleton["payload"] = self._pending
+        self._hub.send_to(self._dev_id, self._cmd_skeleton)
+
+    def _qos_tick(self) -> None:
+        if self._pending is None:
+            return
+
+        # No satisfied check here: the command handlers assign the target
+        # state optimistically, so comparing against it can never tell
+        # "device confirmed" from "we just set it ourselves". Confirmation
+        # lives in handle_state, which clears _pending on a device frame.
+        if (self._loop_time() - self._pending_started) > QOS_MAX_TOTAL_S:
+            _LOGGER.warning("ET-Bus QoS timeout (fan): %s", self._dev_id)
+            self._qos_clear()
+            return
+
+        self._send_now()
+
+        self._pending_try += 1
+        delay_idx = min(self._pending_try, len(QOS_RETRY_DELAYS_S) - 1)
+        delay = QOS_RETRY_DELAYS_S[delay_idx]
+        self._hub.qos_schedule(self._qos_tick, delay)
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        self._is_on = True
+        # keep last speed/preset
+        self._pending = {"on": True}
+        if self._dev_class == "fan.speed":
+            self._pending["speed"] = int(self._percentage)
+        else:
+            self._pending["preset"] = str(self._preset or _PRESET_LIST[0])
+
+        self._pending_started = self._loop_time()
+        self._pending_try = 0
+        self._qos_tick()
+        self._writer()
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        self._is_on = False
+        self._pending = {"on": False}
+        if self._dev_class == "fan.speed":
+            self._pending["speed"] = int(self._percentage)
+        else:
+            self._pending["preset"] = str(self._preset or _PRESET_LIST[0])
+
+        self._pending_started = self._loop_time()
+        self._pending_try = 0
+        self._qos_tick()
+        self._writer()
+
+    async def async_set_percentage(self, percentage: int) -> None:
+        if self._dev_class != "fan.speed":
+            return
+        self._percentage = int(max(0, min(100, percentage)))
+        self._is_on = self._percentage > 0
+
+        self._pending = {"on": self._is_on, "speed": int(self._percentage)}
+        self._pending_started = self._loop_time()
+        self._pending_try = 0
+        self._qos_tick()
+        self._writer()
+
+    async def async_set_preset_mode(self, preset_mode: str) -> None:
+        if self._dev_class != "fan.preset":
+            return
+        self._preset = preset_mode
+        self._is_on = True
+
+        self._pending = {"on": True, "preset": str(preset_mode)}
+        self._pending_started = self._loop_time()
+        self._pending_try = 0
+        self._qos_tick()
+        self._writer()
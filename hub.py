@@ -1,44 +1,152 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import json
 import logging
 import socket
 import time
+from collections import OrderedDict
 from typing import Any, Callable
 
 from homeassistant.core import HomeAssistant
 
 from .const import (
+    DEDUP_CACHE_SIZE,
+    DEDUP_WINDOW_S,
+    DEST_ADDR,
+    DOMAIN,
     MULTICAST_GROUP,
     MULTICAST_PORT,
     PING_INTERVAL,
     OFFLINE_TIMEOUT,
+    SEND_BATCH_WINDOW_S,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Multicast membership request — constant, so build it once at import.
+_MREQ = socket.inet_aton(MULTICAST_GROUP) + socket.inet_aton("0.0.0.0")
+
+# orjson encodes/decodes several times faster than stdlib json and returns
+# bytes directly; fall back to stdlib when it is not installed.
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _json_loads = orjson.loads
+except ImportError:
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    _json_loads = json.loads
+
+# One device-info dict per device id, shared by every entity (switch +
+# sensor + light on the same node) instead of per-entity copies.
+_DEVICE_INFO_CACHE: dict[str, dict[str, Any]] = {}
+
+
+def shared_device_info(dev_id: str) -> dict[str, Any]:
+    info = _DEVICE_INFO_CACHE.get(dev_id)
+    if info is None:
+        info = _DEVICE_INFO_CACHE[dev_id] = {
+            "identifiers": {(DOMAIN, dev_id)},
+            "name": dev_id,
+            "manufacturer": "ElectronicsTech",
+        }
+    return info
+
+
+# The periodic ping only varies in its timestamp — keep the encoded JSON
+# around and splice the ts in, instead of re-serializing every interval.
+_PING_PREFIX = b'{"v":1,"type":"ping","id":"hub","class":"hub","payload":{"ts":'
+_PING_SUFFIX = b"}}"
+
+
+class _EtBusProtocol(asyncio.DatagramProtocol):
+    """Deliver datagrams straight from the selector to the hub."""
+
+    def __init__(self, hub: "EtBusHub") -> None:
+        self._hub = hub
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self._hub._on_datagram(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.error("ET-Bus recv error: %s", exc)
+
 
 class EtBusHub:
     def __init__(self, hass: HomeAssistant):
         self.hass = hass
         self._sock: socket.socket | None = None
+        self._tx_sock: socket.socket | None = None
+        self._transport: asyncio.DatagramTransport | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._send_queue: dict[Any, bytes] = {}
+        self._send_seq = 0
+        self._drain_scheduled = False
+        self._window_sent: dict[Any, bytes] = {}
+        self._dedup: OrderedDict[int, float] = OrderedDict()
+        self._qos_heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._qos_counter = 0
+        self._qos_handle: asyncio.TimerHandle | None = None
         self._devices: dict[str, dict[str, Any]] = {}
-        self._listeners: list[Callable[[dict[str, Any]], None]] = []
+        self._listeners_by_class: dict[str, set[Callable[[dict[str, Any]], None]]] = {}
+        self._listeners_by_prefix: dict[str, set[Callable[[dict[str, Any]], None]]] = {}
+        self._wildcard_listeners: set[Callable[[dict[str, Any]], None]] = set()
         self._tasks: list[asyncio.Task] = []
 
     @property
     def devices(self) -> dict[str, dict[str, Any]]:
         return dict(self._devices)
 
-    def register_listener(self, cb: Callable[[dict[str, Any]], None]) -> None:
-        self._listeners.append(cb)
+    def register_listener(
+        self,
+        cb: Callable[[dict[str, Any]], None],
+        classes: tuple[str, ...] | None = None,
+    ) -> Callable[[], None]:
+        """Register a synchronous @callback to receive bus messages.
+
+        Listeners are invoked directly on the HA event loop from the
+        receive path — no add_job/call_soon hop — so they must be
+        non-blocking @callback functions; wrap coroutine work in
+        hass.async_create_task inside the listener if needed.
+        An entry like "sensor.*" matches every class under that first
+        segment; classes=None means "everything". Returns an unsub
+        callback for config-entry unload.
+        """
+        if classes is None:
+            self._wildcard_listeners.add(cb)
+
+            def unsub() -> None:
+                self._wildcard_listeners.discard(cb)
+
+        else:
+            exact = tuple(c for c in classes if not c.endswith(".*"))
+            prefixes = tuple(c[:-2] for c in classes if c.endswith(".*"))
+            for cls in exact:
+                self._listeners_by_class.setdefault(cls, set()).add(cb)
+            for prefix in prefixes:
+                self._listeners_by_prefix.setdefault(prefix, set()).add(cb)
+
+            def unsub() -> None:
+                for cls in exact:
+                    self._listeners_by_class.get(cls, set()).discard(cb)
+                for prefix in prefixes:
+                    self._listeners_by_prefix.get(prefix, set()).discard(cb)
+
+        return unsub
 
     # -----------------------------------------------------------
     # START / STOP
     # -----------------------------------------------------------
     async def async_start(self) -> None:
         loop = asyncio.get_running_loop()
+        self._loop = loop
 
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -50,8 +158,7 @@ class EtBusHub:
         sock.bind(("", MULTICAST_PORT))
 
         # Join multicast group
-        mreq = socket.inet_aton(MULTICAST_GROUP) + socket.inet_aton("0.0.0.0")
-        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, _MREQ)
 
         # Prevent receiving our own multicast packets where supported
         try:
@@ -59,14 +166,32 @@ class EtBusHub:
         except Exception:
             pass
 
-        sock.setblocking(True)
+        sock.setblocking(False)
         self._sock = sock
 
+        # Dedicated connected socket for sends: connect() fixes the
+        # destination once, so each send skips the per-call address
+        # handling inside sendto. The receive socket stays unconnected —
+        # connecting it would filter out datagrams from device unicast
+        # addresses.
+        tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            tx.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 0)
+        except Exception:
+            pass
+        tx.connect(DEST_ADDR)
+        self._tx_sock = tx
+
+        # Hand the configured socket to asyncio so packets are delivered
+        # directly from the selector — no executor thread, no handoff.
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _EtBusProtocol(self), sock=sock
+        )
+
         _LOGGER.info(
             "ET-Bus hub listening on %s:%s", MULTICAST_GROUP, MULTICAST_PORT
         )
 
-        self._tasks.append(self.hass.loop.create_task(self._receiver(loop)))
         self._tasks.append(self.hass.loop.create_task(self._pinger()))
 
     async def async_stop(self) -> None:
@@ -74,66 +199,213 @@ class EtBusHub:
             task.cancel()
         self._tasks.clear()
 
-        if self._sock:
+        if self._qos_handle:
+            self._qos_handle.cancel()
+            self._qos_handle = None
+        self._qos_heap.clear()
+
+        if self._tx_sock:
+            try:
+                self._tx_sock.close()
+            except Exception:
+                pass
+            self._tx_sock = None
+
+        if self._transport:
+            try:
+                self._transport.close()
+            except Exception:
+                pass
+            self._transport = None
+            self._sock = None
+        elif self._sock:
             try:
                 self._sock.close()
             except Exception:
                 pass
             self._sock = None
 
+    # -----------------------------------------------------------
+    # QOS SCHEDULER
+    # -----------------------------------------------------------
+    # One heap + one loop timer for every pending retry in the
+    # integration, instead of an async_call_later handle per entity per
+    # attempt. Cancellation is handled by the callbacks themselves:
+    # a tick whose command was already confirmed is a no-op.
+    def qos_schedule(self, cb: Callable[[], None], delay: float) -> None:
+        if self._loop is None:
+            return
+        deadline = self._loop.time() + delay
+        self._qos_counter += 1
+        heapq.heappush(self._qos_heap, (deadline, self._qos_counter, cb))
+        self._qos_reschedule()
+
+    def _qos_reschedule(self) -> None:
+        if not self._qos_heap:
+            if self._qos_handle:
+                self._qos_handle.cancel()
+                self._qos_handle = None
+            return
+        next_deadline = self._qos_heap[0][0]
+        if self._qos_handle is not None:
+            if self._qos_handle.when() <= next_deadline:
+                return
+            self._qos_handle.cancel()
+        self._qos_handle = self._loop.call_at(next_deadline, self._qos_fire)
+
+    def _qos_fire(self) -> None:
+        self._qos_handle = None
+        now = self._loop.time()
+        while self._qos_heap and self._qos_heap[0][0] <= now:
+            _, _, cb = heapq.heappop(self._qos_heap)
+            try:
+                cb()
+            except Exception:
+                _LOGGER.exception("ET-Bus QoS tick error")
+        self._qos_reschedule()
+
     # -----------------------------------------------------------
     # SEND
     # -----------------------------------------------------------
     def send(self, message: dict[str, Any]) -> None:
-        if not self._sock:
+        # Encode now (callers may reuse the message dict). Coalescing is
+        # leading-edge: with no window open the frame goes straight to the
+        # wire and a window opens behind it, so user commands pay no
+        # latency. Sends landing inside the window are queued for one
+        # drain at its close; messages for the same (id, class, type)
+        # supersede each other, and a byte-identical repeat of what opened
+        # the window — a QoS retransmit racing the first retry delay — is
+        # dropped outright.
+        dev_id = message.get("id")
+        cls = message.get("class")
+        if dev_id and cls:
+            key = (dev_id, cls, message.get("type"))
+        else:
+            self._send_seq += 1
+            key = self._send_seq
+        data = _json_dumps(message)
+
+        if self._loop is None:
+            self._send_raw(data)
+            return
+
+        if not self._drain_scheduled:
+            self._send_raw(data)
+            self._window_sent[key] = data
+            self._drain_scheduled = True
+            self._loop.call_later(SEND_BATCH_WINDOW_S, self._drain_sends)
+            return
+
+        if self._window_sent.get(key) == data:
+            return
+        self._send_queue[key] = data
+
+    def send_to(self, dev_id: str, message: dict[str, Any]) -> None:
+        # The bus is multicast; devices filter on the id in the envelope,
+        # so targeted sends go out the same way as broadcasts.
+        self.send(message)
+
+    def _drain_sends(self) -> None:
+        self._drain_scheduled = False
+        self._window_sent.clear()
+        queue = self._send_queue
+        if not queue:
+            return
+        self._send_queue = {}
+        for data in queue.values():
+            self._send_raw(data)
+
+    def _send_raw(self, data: bytes) -> None:
+        if not self._tx_sock:
             return
         try:
-            data = json.dumps(message, separators=(",", ":")).encode("utf-8")
-            self._sock.sendto(data, (MULTICAST_GROUP, MULTICAST_PORT))
+            self._tx_sock.send(data)
         except Exception as e:
             _LOGGER.error("ET-Bus send error: %s", e)
 
     # -----------------------------------------------------------
-    # RECEIVE LOOP
+    # RECEIVE PATH
     # -----------------------------------------------------------
-    async def _receiver(self, loop) -> None:
-        if not self._sock:
+    def _on_datagram(self, data: bytes, addr) -> None:
+        try:
+            # Both orjson and stdlib json accept bytes — no str intermediate.
+            msg = _json_loads(data)
+        except Exception:
             return
 
-        while True:
-            try:
-                data, addr = await loop.run_in_executor(
-                    None, self._sock.recvfrom, 4096
-                )
-            except asyncio.CancelledError:
-                return
-            except OSError as e:
-                _LOGGER.error("ET-Bus recv error: %s", e)
-                await asyncio.sleep(1)
-                continue
-
-            try:
-                msg = json.loads(data.decode("utf-8"))
-            except Exception:
-                continue
-
-            # Update device registry
-            self._update_registry(msg, addr)
-
-            # ---------------------------------------------------
-            # ✅ STEP 1 FIX — FIRE EVENT TO HA EVENT BUS
-            # ---------------------------------------------------
-            try:
-                msg_with_meta = dict(msg)
-                msg_with_meta["_src_ip"] = addr[0]
-                msg_with_meta["_rx_ts"] = time.time()
-                self.hass.bus.async_fire("etbus_message", msg_with_meta)
-            except Exception:
-                pass
+        # Update device registry. Liveness uses the monotonic clock — one
+        # read per packet, immune to wall-clock (NTP) jumps.
+        now = time.monotonic()
+        self._update_registry(msg, addr, now)
+
+        # Flag duplicated state frames (multicast re-delivery, device
+        # re-sends); wire-duplicates are bit-identical so hashing the raw
+        # bytes is enough — no canonicalising needed. Duplicates only skip
+        # the etbus_message fan-out below: platform handlers must still see
+        # them, because a device confirming a toggle back to a value it
+        # reported moments ago re-sends the exact same bytes, and the
+        # per-entity no-op-write skips already make repeats cheap.
+        is_dup = False
+        if msg.get("type") == "state":
+            h = hash(data)
+            seen = self._dedup.get(h)
+            if seen is not None and (now - seen) < DEDUP_WINDOW_S:
+                is_dup = True
+            else:
+                self._dedup[h] = now
+                self._dedup.move_to_end(h)
+                if len(self._dedup) > DEDUP_CACHE_SIZE:
+                    self._dedup.popitem(last=False)
+
+        # ---------------------------------------------------
+        # ✅ STEP 1 FIX — FIRE EVENT TO HA EVENT BUS
+        # ---------------------------------------------------
+        try:
+            # Only pay for the copy + fire when something actually
+            # subscribes to etbus_message (the panel, automations). MATCH_ALL
+            # subscribers (dev-tools "listen to all") count under "*".
+            if not is_dup:
+                listeners = self.hass.bus.async_listeners()
+                if listeners.get("etbus_message") or listeners.get("*"):
+                    msg_with_meta = dict(msg)
+                    msg_with_meta["_src_ip"] = addr[0]
+                    msg_with_meta["_rx_ts"] = time.time()
+                    self.hass.bus.async_fire("etbus_message", msg_with_meta)
+        except Exception:
+            pass
 
-            # Notify platform listeners (sensor/light/etc)
-            for cb in list(self._listeners):
-                self.hass.add_job(cb, msg)
+        # Notify platform listeners (sensor/light/etc). All listeners are
+        # synchronous @callback functions and we are already on the HA
+        # loop, so call them directly instead of going through add_job.
+        # class comes off the wire — only strings can be dispatch keys
+        # (anything else would be unhashable or lack .find); wildcard
+        # listeners still see the message below.
+        cls = msg.get("class")
+        if isinstance(cls, str):
+            listeners = self._listeners_by_class.get(cls)
+            if listeners:
+                for cb in listeners:
+                    try:
+                        cb(msg)
+                    except Exception:
+                        _LOGGER.exception("ET-Bus listener error")
+            if self._listeners_by_prefix:
+                dot = cls.find(".")
+                plisteners = (
+                    self._listeners_by_prefix.get(cls[:dot]) if dot > 0 else None
+                )
+                if plisteners:
+                    for cb in plisteners:
+                        try:
+                            cb(msg)
+                        except Exception:
+                            _LOGGER.exception("ET-Bus listener error")
+        if self._wildcard_listeners:
+            for cb in tuple(self._wildcard_listeners):
+                try:
+                    cb(msg)
+                except Exception:
+                    _LOGGER.exception("ET-Bus listener error")
 
     # -----------------------------------------------------------
     # PING LOOP
@@ -145,17 +417,11 @@ class EtBusHub:
             except asyncio.CancelledError:
                 return
 
-            self.send(
-                {
-                    "v": 1,
-                    "type": "ping",
-                    "id": "hub",
-                    "class": "hub",
-                    "payload": {"ts": int(time.time())},
-                }
+            self._send_raw(
+                _PING_PREFIX + str(int(time.time())).encode() + _PING_SUFFIX
             )
 
-            now = time.time()
+            now = time.monotonic()
             for dev_id, info in list(self._devices.items()):
                 last_seen = info.get("last_seen", 0)
                 was_online = info.get("online", False)
@@ -170,7 +436,7 @@ class EtBusHub:
     # -----------------------------------------------------------
     # DEVICE REGISTRY
     # -----------------------------------------------------------
-    def _update_registry(self, msg: dict[str, Any], addr) -> None:
+    def _update_registry(self, msg: dict[str, Any], addr, now: float) -> None:
         if msg.get("v") != 1:
             return
 
@@ -186,7 +452,6 @@ class EtBusHub:
         mtype = msg.get("type")
         payload = msg.get("payload", {}) or {}
 
-        now = time.time()
         dev = self._devices.get(dev_id)
 
         if not dev: